@@ -25,4 +25,35 @@ jwt = JWTManager(app)
 import application.database
 import application.controllers
 import application.validators
+import application.encoding
+import application.profiling
 #import trip_test.models
+
+
+### JWT Error Handlers
+# Route auth failures through content negotiation so
+# MessagePack clients don't get JSON error bodies
+
+@jwt.unauthorized_loader
+def unauthorized(error_string: str) -> tuple:
+    """ No JWT in the request """
+    return application.encoding.respond({"msg": error_string}, 401)
+
+
+@jwt.expired_token_loader
+def expired_token() -> tuple:
+    """ JWT has expired """
+    return application.encoding.respond({"msg": "Token has expired"}, 401)
+
+
+@jwt.invalid_token_loader
+def invalid_token(error_string: str) -> tuple:
+    """ JWT could not be decoded """
+    return application.encoding.respond({"msg": error_string}, 422)
+
+
+### Warm-up
+# Set `WARM_UP=1` to open pooled database connections while the
+# worker boots instead of on its first request
+if os.environ.get('WARM_UP', '0') != '0':
+    application.database.warm_up()
@@ -1,16 +1,20 @@
 """
 Controllers
 """
+import os
 from application import app
 from application import database
 from application import validators
-from flask import request, jsonify
+from application import encoding
+from application import profiling
+from flask import request, send_from_directory
 from flask_jwt_extended import (jwt_required,
                                 create_access_token,
                                 get_jwt_identity)
 
 @app.route('/', methods=['GET'])
 @jwt_required
+@profiling.profiled
 def get_entry() -> request:
     """ Retrieve a member from the member table.
     Requires acess_rights >= 1 """
@@ -18,13 +22,14 @@ def get_entry() -> request:
     # Validate access rights
     _, access_rights = get_jwt_identity()
     if access_rights == 0:
-        return jsonify({"msg": "Access Denied"}), 403
+        return encoding.respond({"msg": "Access Denied"}, 403)
 
     # Validate request
-    if not validators.json(request):
-        return jsonify({"msg": "Missing JSON In Request"}), 400
+    body = encoding.load(request)
+    if not validators.fields(request.method, body):
+        return encoding.respond({"msg": "Missing JSON In Request"}, 400)
 
-    member_id = request.get_json()['memberID']
+    member_id = body['memberID']
 
     # Connect to database
     db_connection = database.get()
@@ -43,13 +48,14 @@ def get_entry() -> request:
                         'email': member[2],
                         'phone': member[3]
                       }
-        return jsonify(member_dict), 200
+        return encoding.respond(member_dict, 200)
     else:
-        return jsonify({'msg': 'No Such User'}), 400
+        return encoding.respond({'msg': 'No Such User'}, 400)
 
 
 @app.route('/', methods=['PUT'])
 @jwt_required
+@profiling.profiled
 def add_entry() -> request:
     """ Add or update a member in the member table.
     Requires acess_rights == 2 """
@@ -57,18 +63,19 @@ def add_entry() -> request:
     # Validate access rights
     _, access_rights = get_jwt_identity()
     if access_rights <= 1:
-        return jsonify({"msg": "Access Denied"}), 200
+        return encoding.respond({"msg": "Access Denied"}, 200)
 
     # Validate request
-    if not validators.json(request):
-        return jsonify({"msg": "Missing JSON In Request"}), 400
-    if not (validators.email(request.get_json()['email']) or
-            validators.phone(request.get_json()['phone'])):
-        return jsonify({"msg": "Invalid Phone Number or Email"}), 400
+    body = encoding.load(request)
+    if not validators.fields(request.method, body):
+        return encoding.respond({"msg": "Missing JSON In Request"}, 400)
+    if not (validators.email(body['email']) or
+            validators.phone(body['phone'])):
+        return encoding.respond({"msg": "Invalid Phone Number or Email"}, 400)
 
-    name = request.get_json()['name']
-    email = request.get_json()['email']
-    phone = request.get_json()['phone']
+    name = body['name']
+    email = body['email']
+    phone = body['phone']
 
     # Query Database
     # Based on my research, the `sqlite3` module does not
@@ -91,18 +98,19 @@ def add_entry() -> request:
 
     # Name field already exists
     if member:
-        return jsonify({"msg": "Name Already Exists"}), 409
+        return encoding.respond({"msg": "Name Already Exists"}, 409)
     # Name field doesn't exist so create a row
     else:
         statement = 'INSERT INTO members (name, email, phone) \
                     VALUES (%s, %s, %s)'
         cursor.execute(statement, (name, email, phone))
     db_connection.commit()
-    return jsonify({"msg": "Success"}), 201
+    return encoding.respond({"msg": "Success"}, 201)
 
 
 @app.route('/', methods=['DELETE'])
 @jwt_required
+@profiling.profiled
 def delete_entry() -> request:
     """ Removes a user with given memberID from
     the member table. Requires acess_rights == 3 """
@@ -110,12 +118,13 @@ def delete_entry() -> request:
     # Validate access rights
     _, access_rights = get_jwt_identity()
     if access_rights <= 2:
-        return jsonify({"msg": "Access Denied"}), 200
+        return encoding.respond({"msg": "Access Denied"}, 200)
 
     # Validate request
-    if not validators.json(request):
-        return jsonify({"msg": "Missing JSON In Request"}), 400
-    member_id = request.get_json()['memberID']
+    body = encoding.load(request)
+    if not validators.fields(request.method, body):
+        return encoding.respond({"msg": "Missing JSON In Request"}, 400)
+    member_id = body['memberID']
 
     # Connect to database
     db_connection = database.get()
@@ -133,24 +142,25 @@ def delete_entry() -> request:
         statement = 'DELETE FROM members WHERE memberID=%s'
         cursor.execute(statement, (member_id,))
         db_connection.commit()
-        return jsonify({"msg": "success"}), 200
-    return jsonify({"msg": "No Such Entry"}), 404
+        return encoding.respond({"msg": "success"}, 200)
+    return encoding.respond({"msg": "No Such Entry"}, 404)
 
 
 @app.route('/login', methods=['POST'])
+@profiling.profiled
 def login() -> request:
     """ Accept login info and return JWT token """
 
     if not request.is_json:
-        return jsonify({"msg": "Missing JSON In Request"}), 400
+        return encoding.respond({"msg": "Missing JSON In Request"}, 400)
 
     username = request.get_json().get('username', None)
     password = request.get_json().get('password', None)
 
     if not username:
-        return jsonify({"msg": "Missing username parameter"}), 400
+        return encoding.respond({"msg": "Missing username parameter"}, 400)
     if not password:
-        return jsonify({"msg": "Missing password parameter"}), 400
+        return encoding.respond({"msg": "Missing password parameter"}, 400)
 
     # Connect to database
     db_connection = database.get()
@@ -168,11 +178,54 @@ def login() -> request:
         db_password = user[2]
         # Wrong password
         if password != db_password:
-            return jsonify({"msg": "Bad Username Or Password"}), 401
+            return encoding.respond({"msg": "Bad Username Or Password"}, 401)
         # Success
         else:
             access_token = create_access_token(identity=[username, user[3]])
-            return jsonify(access_token=access_token), 200
+            return encoding.respond({'access_token': access_token}, 200)
     # No such username
     else:
-        return jsonify({"msg": "Bad Username Or Password"}), 401
+        return encoding.respond({"msg": "Bad Username Or Password"}, 401)
+
+
+@app.route('/profile', methods=['POST'])
+@jwt_required
+def start_profile() -> request:
+    """ Start sampling stacks across all requests in this
+    worker for a time window. Requires acess_rights == 3 """
+
+    # Validate access rights
+    if not profiling.is_admin():
+        return encoding.respond({"msg": "Access Denied"}, 403)
+
+    body = encoding.load(request) or {}
+    try:
+        seconds = float(body.get('seconds', 30))
+        interval = float(body.get('interval', 0.01))
+    except (TypeError, ValueError):
+        return encoding.respond({"msg": "Invalid Sampling Parameters"}, 400)
+    if not (0 < seconds <= 600 and 0 < interval <= 1):
+        return encoding.respond({"msg": "Invalid Sampling Parameters"}, 400)
+
+    sampler = profiling.start_sampler(seconds, interval)
+    if not sampler:
+        return encoding.respond({"msg": "Sampler Already Running"}, 409)
+    return encoding.respond({"msg": "Sampling Started",
+                             "file": os.path.basename(sampler.path)}, 202)
+
+
+@app.route('/profile/<name>', methods=['GET'])
+@jwt_required
+def get_profile(name: str) -> request:
+    """ Download a pstats dump or collapsed stack file
+    from PROFILE_DIR. Requires acess_rights == 3 """
+
+    # Validate access rights
+    if not profiling.is_admin():
+        return encoding.respond({"msg": "Access Denied"}, 403)
+
+    if name not in profiling.files():
+        return encoding.respond({"msg": "No Such Profile"}, 404)
+    return send_from_directory(app.config['PROFILE_DIR'], name,
+                               mimetype='application/octet-stream',
+                               as_attachment=True)
@@ -3,10 +3,35 @@ postgres/psycopg2 wrapper
 """
 import psycopg2
 import os
+import time
+import threading
 from urllib import parse
+from psycopg2.pool import ThreadedConnectionPool
 from application import app
+from application import encoding
 from flask import g
 
+app.config.setdefault('DATABASE_POOL_MIN',
+                      int(os.environ.get('DATABASE_POOL_MIN', 1)))
+app.config.setdefault('DATABASE_POOL_MAX',
+                      int(os.environ.get('DATABASE_POOL_MAX', 10)))
+# Seconds a connection can sit in the pool before it is
+# pinged on checkout
+app.config.setdefault('DATABASE_PING_AFTER',
+                      float(os.environ.get('DATABASE_PING_AFTER', 30)))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# When each pooled connection was last returned
+_released = {}
+
+
+class Unavailable(Exception):
+    """ Raised when no connection can be taken from the pool,
+    either because the server can't be reached or because all
+    DATABASE_POOL_MAX connections are in use """
+
 
 def config(filename='database.ini', section='postgresql'):
     """ Loads database config """
@@ -31,38 +56,124 @@ def config(filename='database.ini', section='postgresql'):
     return db_config
 
 
-def connect():
-    """ Connect to the PostgreSQL database server """
-    conn = None
+def pool():
+    """ Returns the connection pool, creating it
+    on first use """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # connect to the PostgreSQL server
+            print('Connecting to the PostgreSQL database...')
+            _pool = ThreadedConnectionPool(app.config['DATABASE_POOL_MIN'],
+                                           app.config['DATABASE_POOL_MAX'],
+                                           **config())
+    return _pool
+
+
+def alive(conn) -> bool:
+    """ True if a pooled connection can still reach the server.
+    Connections returned recently are trusted without a round
+    trip; older ones are pinged with `SELECT 1`. """
+    if conn.closed:
+        return False
+
+    idle = time.monotonic() - _released.pop(conn, time.monotonic())
+    if idle < app.config['DATABASE_PING_AFTER']:
+        return True
     try:
-        # read connection parameters
-        params = config()
- 
-        # connect to the PostgreSQL server
-        print('Connecting to the PostgreSQL database...')
-        conn = psycopg2.connect(**params)
+        cursor = conn.cursor()
+        cursor.execute('SELECT 1')
+        cursor.close()
+        return True
+    except psycopg2.Error:
+        return False
 
-        return conn
+
+def connect():
+    """ Take a live connection to the PostgreSQL database
+    server from the pool. Connections that died while pooled
+    (server restart, failover, idle disconnect) are discarded.
+    Returns None if the server can't be reached or the pool
+    is exhausted. """
+    try:
+        connections = pool()
+        # Every dead connection is closed as it is found, so
+        # after DATABASE_POOL_MAX tries the pool opens a new one
+        for _ in range(app.config['DATABASE_POOL_MAX'] + 1):
+            conn = connections.getconn()
+            if alive(conn):
+                return conn
+            connections.putconn(conn, close=True)
 
     except (Exception, psycopg2.DatabaseError) as error:
         print(error)
 
 
+def release(conn) -> None:
+    """ Return a connection to the pool. The pool rolls
+    back any transaction left open. """
+    _released[conn] = time.monotonic()
+    pool().putconn(conn)
+    # The pool closes connections beyond DATABASE_POOL_MIN
+    if conn.closed:
+        _released.pop(conn, None)
+
+
 def get():
     """ returns the database if already connected
     else connects database and returns it """
 
     if not hasattr(g, 'postgres'):
-        g.postgres = connect()
+        conn = connect()
+        if conn is None:
+            raise Unavailable()
+        g.postgres = conn
     return g.postgres
 
 
+@app.errorhandler(Unavailable)
+def unavailable(error) -> tuple:
+    """ Report a missing connection instead of
+    failing on `None.cursor()` """
+
+    return encoding.respond({"msg": "Database Unavailable"}, 503)
+
+
+# Lookups the routes make, with keys that match nothing. Running
+# them loads each new backend's catalog caches for these tables
+PRIME_STATEMENTS = (
+    ('SELECT * FROM members WHERE memberID=%s', (-1,)),
+    ('SELECT name FROM members WHERE name=%s', ('',)),
+    ('SELECT * FROM users where username=%s', ('',)),
+)
+
+
+def warm_up() -> None:
+    """ Opens DATABASE_POOL_MIN pooled connections and primes
+    each one so the first requests don't pay for connecting """
+
+    connections = [connect() for _ in range(app.config['DATABASE_POOL_MIN'])]
+    for conn in connections:
+        if conn is None:
+            continue
+        try:
+            cursor = conn.cursor()
+            for statement, params in PRIME_STATEMENTS:
+                cursor.execute(statement, params)
+            cursor.close()
+        # Tables are missing until `flask initdb` has run
+        except psycopg2.Error as error:
+            print(error)
+        release(conn)
+
+
 @app.teardown_appcontext
 def close(error) -> None:
     """ Close database connect """
 
-    if hasattr(g, 'postgres'):
-        g.postgres.close()
+    conn = g.pop('postgres', None)
+    if conn is not None:
+        release(conn)
 
 
 def init() -> None:
@@ -0,0 +1,55 @@
+"""
+Content Negotiation Helper Functions
+"""
+from typing import Optional
+from flask import request, Response, jsonify
+
+JSON = 'application/json'
+MSGPACK = 'application/x-msgpack'
+MSGPACK_TYPES = (MSGPACK, 'application/msgpack')
+
+
+def is_msgpack(req: request) -> bool:
+    """ True if the request body is MessagePack encoded """
+    return req.mimetype in MSGPACK_TYPES
+
+
+def load(req: request) -> Optional[dict]:
+    """ Decode the request body as JSON or MessagePack
+    depending on its content type. Returns None if the
+    body is missing or can't be decoded. """
+    if is_msgpack(req):
+        import msgpack
+        # unpackb raises a variety of exceptions for malformed
+        # data, e.g. TypeError for unhashable map keys
+        try:
+            body = msgpack.unpackb(req.get_data(), raw=False)
+        except Exception:
+            return None
+    else:
+        body = req.get_json(silent=True)
+
+    if not isinstance(body, dict):
+        return None
+    return body
+
+
+def accepts_msgpack(req: request) -> bool:
+    """ True if the client prefers a MessagePack response.
+    JSON wins ties so it remains the default. """
+    best = req.accept_mimetypes.best_match((JSON,) + MSGPACK_TYPES,
+                                           default=JSON)
+    return best in MSGPACK_TYPES
+
+
+def respond(data: dict, status: int) -> tuple:
+    """ Serialize `data` in the format requested by the
+    `Accept` header and return a (response, status) pair """
+    if accepts_msgpack(request):
+        import msgpack
+        body = msgpack.packb(data, use_bin_type=True)
+        response = Response(body, mimetype=MSGPACK)
+    else:
+        response = jsonify(data)
+    response.vary.add('Accept')
+    return response, status
@@ -0,0 +1,180 @@
+"""
+Request Profiling Helper Functions
+"""
+import os
+import sys
+import time
+import tempfile
+import threading
+import collections
+import marshal
+from functools import wraps
+from application import app
+from flask import request, Response
+from jwt import InvalidTokenError
+from flask_jwt_extended import jwt_optional, get_jwt_identity
+from flask_jwt_extended.exceptions import JWTExtendedException
+
+HEADER = 'X-Profile'
+
+app.config.setdefault('PROFILE_DIR',
+                      os.path.join(tempfile.gettempdir(), 'trip_test_profiles'))
+app.config.setdefault('PROFILE_MAX_FILES', 50)
+
+# Frames below Flask's request entry point are request handling,
+# anything else is the server idling in its accept loop
+_REQUEST_CODE = type(app).wsgi_app.__code__
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def is_admin() -> bool:
+    """ True if the current JWT identity has access_rights == 3 """
+    identity = get_jwt_identity()
+    if not identity:
+        return False
+    _, access_rights = identity
+    return access_rights == 3
+
+
+def files() -> list:
+    """ Names of the dumps in PROFILE_DIR, oldest first """
+    directory = app.config['PROFILE_DIR']
+    if not os.path.isdir(directory):
+        return []
+    mtimes = {}
+    for name in os.listdir(directory):
+        # Another worker may prune a file between listdir and stat
+        try:
+            mtimes[name] = os.stat(os.path.join(directory, name)).st_mtime
+        except OSError:
+            continue
+    return sorted(mtimes, key=mtimes.get)
+
+
+def prune(keep: int) -> None:
+    """ Delete the oldest dumps so at most `keep` remain """
+    directory = app.config['PROFILE_DIR']
+    names = files()
+    for name in names[:max(len(names) - keep, 0)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+def output_path(name: str, extension: str) -> str:
+    """ Create a uniquely named file inside PROFILE_DIR,
+    pruning old dumps to stay under PROFILE_MAX_FILES """
+    directory = app.config['PROFILE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    prune(app.config['PROFILE_MAX_FILES'] - 1)
+    fd, path = tempfile.mkstemp(prefix=name + '.', suffix='.' + extension,
+                                dir=directory)
+    os.close(fd)
+    return path
+
+
+def profiled(view):
+    """ Runs a single request under cProfile when the
+    `X-Profile` header is set by an admin user.
+
+    `X-Profile: return` replaces the response with the marshalled
+    pstats dump. Any other value writes the dump to PROFILE_DIR
+    and returns its name in the `X-Profile-File` response header,
+    to be fetched from `GET /profile/<name>`. """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        mode = request.headers.get(HEADER)
+        if not mode:
+            return view(*args, **kwargs)
+
+        # Routes without `jwt_required` still need the token
+        # verified before we can check access rights. A bad
+        # token there just means the request isn't profiled.
+        if get_jwt_identity() is None and 'Authorization' in request.headers:
+            try:
+                jwt_optional(lambda: None)()
+            except (JWTExtendedException, InvalidTokenError):
+                return view(*args, **kwargs)
+        if not is_admin():
+            return view(*args, **kwargs)
+
+        import cProfile
+        profiler = cProfile.Profile()
+        result = profiler.runcall(view, *args, **kwargs)
+
+        if mode == 'return':
+            profiler.create_stats()
+            return Response(marshal.dumps(profiler.stats),
+                            mimetype='application/octet-stream')
+
+        path = output_path('%s.%s' % (request.method, view.__name__), 'prof')
+        profiler.dump_stats(path)
+
+        response = app.make_response(result)
+        response.headers['X-Profile-File'] = os.path.basename(path)
+        return response
+    return wrapper
+
+
+class Sampler(threading.Thread):
+    """ Low overhead statistical profiler. Periodically samples
+    the stacks of every thread that is handling a request and
+    writes them, rooted at Flask's `wsgi_app`, in collapsed
+    (flamegraph.pl compatible) format. """
+
+    def __init__(self, seconds: float, interval: float, path: str):
+        super().__init__(daemon=True)
+        self.seconds = seconds
+        self.interval = interval
+        self.path = path
+        self.stacks = collections.Counter()
+
+    def sample(self) -> None:
+        """ Record the current stack of each thread
+        that is inside a request """
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == self.ident:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append('%s:%s' % (os.path.basename(code.co_filename),
+                                        code.co_name))
+                if code is _REQUEST_CODE:
+                    self.stacks[';'.join(reversed(stack))] += 1
+                    break
+                frame = frame.f_back
+
+    def run(self) -> None:
+        global _sampler
+        try:
+            deadline = time.monotonic() + self.seconds
+            while time.monotonic() < deadline:
+                self.sample()
+                time.sleep(self.interval)
+
+            with open(self.path, 'w') as output:
+                for stack, count in self.stacks.most_common():
+                    output.write('%s %d\n' % (stack, count))
+        finally:
+            # Always release the slot so a failed write
+            # doesn't block sampling until restart
+            with _sampler_lock:
+                _sampler = None
+
+
+def start_sampler(seconds: float, interval: float) -> Sampler:
+    """ Start sampling for `seconds`. Returns the running
+    Sampler, or None if one is already running in this
+    process. """
+    global _sampler
+    with _sampler_lock:
+        if _sampler is not None:
+            return None
+        _sampler = Sampler(seconds, interval, output_path('sample', 'folded'))
+        _sampler.start()
+        return _sampler
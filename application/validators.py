@@ -18,17 +18,22 @@ def email(email: str) -> bool:
 
 def json(req: request) -> bool:
     """ ensure json requests contain correct fields """
-    if not req.json:
+    return fields(req.method, req.json)
+
+
+def fields(method: str, body: dict) -> bool:
+    """ ensure a decoded request body contains correct fields """
+    if not body:
         return False
 
-    if ((req.method == 'DELETE' or
-         req.method == 'GET') and
-            not 'memberID' in req.json):
+    if ((method == 'DELETE' or
+         method == 'GET') and
+            not 'memberID' in body):
         return False
 
-    if (req.method == 'PUT' and
-            (not 'name' in req.json or
-             not 'email' in req.json or
-             not 'phone' in req.json)):
+    if (method == 'PUT' and
+            (not 'name' in body or
+             not 'email' in body or
+             not 'phone' in body)):
         return False
     return True
@@ -0,0 +1,95 @@
+"""
+Startup Benchmark
+
+Measures cold start cost of a worker: the time to import
+`application` and the time to serve its first request. Each
+run happens in a fresh interpreter so nothing is cached.
+
+    $ python benchmarks/startup.py --runs 10
+    $ WARM_UP=1 python benchmarks/startup.py --runs 10
+
+The request is a real `/login`, so DATABASE_URL must point
+at an initialized database.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Executed in a child interpreter. Prints one JSON line.
+CHILD = '''
+import json
+import time
+import sys
+sys.path.insert(0, %r)
+
+start = time.perf_counter()
+import application
+imported = time.perf_counter()
+
+# Building the test client, and the idna codec it loads on its
+# first request, aren't part of a real worker's startup
+import encodings.idna
+client = application.app.test_client()
+ready = time.perf_counter()
+
+def login():
+    return client.post('/login',
+                       data=json.dumps(dict(username='admin_user',
+                                            password='password')),
+                       headers={'content-type': 'application/json'})
+
+response = login()
+responded = time.perf_counter()
+login()
+second = time.perf_counter()
+
+print(json.dumps(dict(import_time=imported - start,
+                      first_response=responded - ready,
+                      second_response=second - responded,
+                      status=response.status_code,
+                      modules=len(sys.modules))))
+''' % ROOT
+
+
+def run_once() -> dict:
+    """ Run one cold start in a subprocess and
+    return its measurements """
+    output = subprocess.check_output([sys.executable, '-c', CHILD],
+                                     env=os.environ.copy())
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def report(name: str, values: list) -> None:
+    """ Print median/min/max in milliseconds """
+    print('%-16s median %8.2fms  min %8.2fms  max %8.2fms' %
+          (name,
+           statistics.median(values) * 1000,
+           min(values) * 1000,
+           max(values) * 1000))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+
+    print('runs: %d  warm up: %s  modules loaded: %d  first status: %d' %
+          (args.runs,
+           'off' if os.environ.get('WARM_UP', '0') == '0' else 'on',
+           results[0]['modules'],
+           results[0]['status']))
+    report('import', [r['import_time'] for r in results])
+    report('first response', [r['first_response'] for r in results])
+    report('second response', [r['second_response'] for r in results])
+    report('total', [r['import_time'] + r['first_response'] for r in results])
+
+
+if __name__ == '__main__':
+    main()
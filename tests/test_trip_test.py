@@ -5,7 +5,13 @@ sys.path.insert(0,os.path.abspath(__file__+"/../.."))
 
 import unittest
 import json
+import shutil
+import threading
+import marshal
 import tempfile
+import msgpack
+import psycopg2
+import psycopg2.extensions
 import application as trip_test
 from flask import request, Response
 
@@ -67,6 +73,14 @@ class ValidatorsTestCases(unittest.TestCase):
         self.assertFalse(trip_test.validators.json(resp))
 
 
+    def test_fields_a(self):
+        """
+        fields validator failure test
+        Uses a DELETE request with no body
+        """
+        self.assertFalse(trip_test.validators.fields('DELETE', None))
+
+
     def test_email_a(self):
         """
         email validator success test
@@ -119,16 +133,126 @@ class ValidatorsTestCases(unittest.TestCase):
         self.assertFalse(trip_test.validators.phone(number))
 
 
+class DatabaseTestCases(unittest.TestCase):
+    def test_warm_up_a(self):
+        """
+        warm_up success test
+        Requests reuse the pooled connection and
+        return it to the pool on teardown
+        """
+        trip_test.database.warm_up()
+        with trip_test.app.app_context():
+            first = trip_test.database.get()
+        with trip_test.app.app_context():
+            second = trip_test.database.get()
+        with self.subTest():
+            self.assertIs(first, second)
+
+        pooled = trip_test.database.pool().getconn()
+        trip_test.database.pool().putconn(pooled)
+        with self.subTest():
+            self.assertIs(pooled, second)
+
+
+    def test_connect_a(self):
+        """
+        connect success test
+        A pooled connection that died is replaced
+        """
+        trip_test.database.warm_up()
+        with trip_test.app.app_context():
+            dead = trip_test.database.get()
+        dead.close()
+
+        with trip_test.app.app_context():
+            conn = trip_test.database.get()
+        with self.subTest():
+            self.assertIsNot(conn, dead)
+        with self.subTest():
+            self.assertFalse(conn.closed)
+
+
+    def test_connect_b(self):
+        """
+        connect success test
+        A connection the server dropped while it sat
+        idle in the pool is replaced
+        """
+        trip_test.database.warm_up()
+        with trip_test.app.app_context():
+            dropped = trip_test.database.get()
+
+        # Kill the pooled connection from the server side
+        admin = psycopg2.connect(**trip_test.database.config())
+        cursor = admin.cursor()
+        cursor.execute('SELECT pg_terminate_backend(%s)',
+                       (dropped.get_backend_pid(),))
+        admin.close()
+
+        ping_after = trip_test.app.config['DATABASE_PING_AFTER']
+        trip_test.app.config['DATABASE_PING_AFTER'] = 0
+        try:
+            with trip_test.app.app_context():
+                conn = trip_test.database.get()
+                cursor = conn.cursor()
+                cursor.execute('SELECT 1')
+            with self.subTest():
+                self.assertIsNot(conn, dropped)
+            with self.subTest():
+                self.assertTrue(dropped.closed)
+        finally:
+            trip_test.app.config['DATABASE_PING_AFTER'] = ping_after
+
+
+    def test_connect_c(self):
+        """
+        connect success test
+        A recently returned connection is reused
+        without a round trip
+        """
+        trip_test.database.warm_up()
+        with trip_test.app.app_context():
+            trip_test.database.get()
+        with trip_test.app.app_context():
+            conn = trip_test.database.get()
+            self.assertEqual(conn.get_transaction_status(),
+                             psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+
+
 class ControllersTestCases(unittest.TestCase):
+    # content type, encoder and decoder for each supported encoding
+    CODECS = {
+        'json': ('application/json',
+                 json.dumps,
+                 lambda data: json.loads(data.decode())),
+        'msgpack': ('application/x-msgpack',
+                    msgpack.packb,
+                    lambda data: msgpack.unpackb(data, raw=False)),
+    }
+
     def setUp(self):
         # Create temp database
         self.db_fd, trip_test.app.config['DATABASE'] = tempfile.mkstemp()
+        trip_test.app.config['PROFILE_DIR'] = tempfile.mkdtemp()
         trip_test.app.testing = True
         self.app = trip_test.app.test_client()
+        self.reset()
+
+
+    def tearDown(self):
+        os.close(self.db_fd)
+        os.unlink(trip_test.app.config['DATABASE'])
+        shutil.rmtree(trip_test.app.config['PROFILE_DIR'])
+
+
+    def reset(self):
+        """
+        Rewrite the schema and load an initial
+        mock member.
+        """
         with trip_test.app.app_context():
             trip_test.database.init()
-        
-        # Load an initial mock member
+
         name = 'initial user'
         email = 'initial@user.foo'
         phone = '9999999999'
@@ -137,11 +261,6 @@ class ControllersTestCases(unittest.TestCase):
         self.put_helper('admin_user', mock_data)
 
 
-    def tearDown(self):
-        os.close(self.db_fd)
-        os.unlink(trip_test.app.config['DATABASE'])
-
-
     def login(self, username: str, password: str)-> str:
         """
         Helper function for user auth. Takes a
@@ -160,21 +279,43 @@ class ControllersTestCases(unittest.TestCase):
             return json_response['msg']
 
 
-    def put_helper(self, user: str, data: dict) -> dict:
+    def request_helper(self, method: str, user: str, data: dict,
+                       codec: str='json') -> Response:
         """
-        Insert a row into members table using a 
-        put request. Returns the response.
+        Send `data` encoded with `codec` as `user`.
+        JSON requests send no `Accept` header so the
+        default encoding is exercised.
         """
+        content_type, encode, _ = self.CODECS[codec]
+
         # Login
         access_token = self.login(user, 'password')
 
-
-        headers = {'content-type': 'application/json',
+        headers = {'content-type': content_type,
                    'Authorization': 'Bearer %s' % access_token}
-        response = self.app.put('/',
-                                data=json.dumps(data),
-                                headers=headers)
-        return response
+        if codec != 'json':
+            headers['Accept'] = content_type
+        return self.app.open('/', method=method,
+                             data=encode(data),
+                             headers=headers)
+
+
+    def decode(self, response: Response, codec: str='json') -> dict:
+        """
+        Check a response is in `codec` and decode it.
+        """
+        content_type, _, decode = self.CODECS[codec]
+        self.assertEqual(response.mimetype, content_type)
+        return decode(response.get_data())
+
+
+    def put_helper(self, user: str, data: dict,
+                   codec: str='json') -> Response:
+        """
+        Insert a row into members table using a 
+        put request. Returns the response.
+        """
+        return self.request_helper('PUT', user, data, codec)
 
 
     def test_login_a(self):
@@ -196,7 +337,7 @@ class ControllersTestCases(unittest.TestCase):
         self.assertEqual(access_token, 'Bad Username Or Password')
 
 
-    def test_login_b(self):
+    def test_login_c(self):
         """
         login controller failure test.
         Bad password
@@ -206,25 +347,40 @@ class ControllersTestCases(unittest.TestCase):
         self.assertEqual(access_token, 'Bad Username Or Password')
 
 
-    def test_get_entry_a(self):
-        """ 
-        get_entry controller success test.
+    def test_login_d(self):
+        """
+        login controller success test.
+        A bad token with `X-Profile` is ignored.
         """
 
-        # Login
-        access_token = self.login('admin_user', 'password')
-
-        # Generate request
         headers = {'content-type': 'application/json',
-                   'Authorization': 'Bearer %s' % access_token}
-        response = self.app.get('/',
-                                data=json.dumps(dict(memberID='1')),
-                                headers=headers)
+                   'X-Profile': 'return',
+                   'Authorization': 'Bearer not-a-token'}
+        response = self.app.post('/login',
+                 data=json.dumps(dict(username='admin_user',
+                                      password='password')),
+                 headers=headers)
         with self.subTest():
             self.assertEqual(response.status_code, 200)
         with self.subTest():
             json_response = json.loads(response.get_data(as_text=True))
-            self.assertEqual(json_response['name'], 'initial user')
+            self.assertIn('access_token', json_response)
+
+
+    def test_get_entry_a(self):
+        """ 
+        get_entry controller success test.
+        """
+
+        for codec in self.CODECS:
+            with self.subTest(codec=codec):
+                response = self.request_helper('GET', 'admin_user',
+                                               dict(memberID='1'), codec)
+                with self.subTest():
+                    self.assertEqual(response.status_code, 200)
+                with self.subTest():
+                    body = self.decode(response, codec)
+                    self.assertEqual(body['name'], 'initial user')
 
 
     def test_get_entry_b(self):
@@ -233,20 +389,15 @@ class ControllersTestCases(unittest.TestCase):
         User has wrong access privilege.
         """
 
-        # Login
-        access_token = self.login('nothing_user', 'password')
-
-        # Generate request
-        headers = {'content-type': 'application/json',
-                   'Authorization': 'Bearer %s' % access_token}
-        response = self.app.get('/',
-                                data=json.dumps(dict(memberID='1')),
-                                headers=headers)
-        with self.subTest():
-            self.assertEqual(response.status_code, 403)
-        with self.subTest():
-            json_response = json.loads(response.get_data(as_text=True))
-            self.assertEqual(json_response['msg'], 'Access Denied')
+        for codec in self.CODECS:
+            with self.subTest(codec=codec):
+                response = self.request_helper('GET', 'nothing_user',
+                                               dict(memberID='1'), codec)
+                with self.subTest():
+                    self.assertEqual(response.status_code, 403)
+                with self.subTest():
+                    body = self.decode(response, codec)
+                    self.assertEqual(body['msg'], 'Access Denied')
 
 
     def test_get_entry_c(self):
@@ -255,20 +406,58 @@ class ControllersTestCases(unittest.TestCase):
         No such `memberID`
         """
 
+        for codec in self.CODECS:
+            with self.subTest(codec=codec):
+                response = self.request_helper('GET', 'admin_user',
+                                               dict(memberID='11'), codec)
+                with self.subTest():
+                    self.assertEqual(response.status_code, 400)
+                with self.subTest():
+                    body = self.decode(response, codec)
+                    self.assertEqual(body['msg'], 'No Such User')
+
+
+    def test_get_entry_d(self):
+        """ 
+        get_entry controller success test.
+        `Accept: */*` still returns JSON.
+        """
+
         # Login
         access_token = self.login('admin_user', 'password')
 
         # Generate request
         headers = {'content-type': 'application/json',
+                   'Accept': '*/*',
                    'Authorization': 'Bearer %s' % access_token}
         response = self.app.get('/',
-                                data=json.dumps(dict(memberID='11')),
+                                data=json.dumps(dict(memberID='1')),
                                 headers=headers)
         with self.subTest():
-            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.status_code, 200)
         with self.subTest():
-            json_response = json.loads(response.get_data(as_text=True))
-            self.assertEqual(json_response['msg'], 'No Such User')
+            body = self.decode(response, 'json')
+            self.assertEqual(body['name'], 'initial user')
+
+
+    def test_get_entry_e(self):
+        """ 
+        get_entry controller failure test.
+        Missing token is reported in the requested encoding.
+        """
+
+        for codec in self.CODECS:
+            with self.subTest(codec=codec):
+                content_type, encode, _ = self.CODECS[codec]
+                headers = {'content-type': content_type,
+                           'Accept': content_type}
+                response = self.app.get('/',
+                                        data=encode(dict(memberID='1')),
+                                        headers=headers)
+                with self.subTest():
+                    self.assertEqual(response.status_code, 401)
+                with self.subTest():
+                    self.assertIn('msg', self.decode(response, codec))
 
 
     def test_add_entry_a(self):
@@ -282,8 +471,15 @@ class ControllersTestCases(unittest.TestCase):
         phone = '8001234567'
         mock_data = dict(name=name, email=email, phone=phone)
 
-        response = self.put_helper('admin_user', mock_data)
-        self.assertEqual(response.status_code, 201)
+        for codec in self.CODECS:
+            with self.subTest(codec=codec):
+                self.reset()
+                response = self.put_helper('admin_user', mock_data, codec)
+                with self.subTest():
+                    self.assertEqual(response.status_code, 201)
+                with self.subTest():
+                    body = self.decode(response, codec)
+                    self.assertEqual(body['msg'], 'Success')
 
 
     def test_add_entry_b(self):
@@ -298,12 +494,14 @@ class ControllersTestCases(unittest.TestCase):
         phone = '8001234567'
         mock_data = dict(name=name, email=email, phone=phone)
 
-        response = self.put_helper('get_user', mock_data)
-        with self.subTest():
-            self.assertEqual(response.status_code, 200)
-        with self.subTest():
-            json_response = json.loads(response.get_data(as_text=True))
-            self.assertEqual(json_response['msg'], 'Access Denied')
+        for codec in self.CODECS:
+            with self.subTest(codec=codec):
+                response = self.put_helper('get_user', mock_data, codec)
+                with self.subTest():
+                    self.assertEqual(response.status_code, 200)
+                with self.subTest():
+                    body = self.decode(response, codec)
+                    self.assertEqual(body['msg'], 'Access Denied')
 
     
     def test_add_entry_c(self):
@@ -318,12 +516,63 @@ class ControllersTestCases(unittest.TestCase):
         phone = '8001234567'
         mock_data = dict(name=name, email=email, phone=phone)
 
-        response = self.put_helper('admin_user', mock_data)
+        for codec in self.CODECS:
+            with self.subTest(codec=codec):
+                response = self.put_helper('admin_user', mock_data, codec)
+                with self.subTest():
+                    self.assertEqual(response.status_code, 409)
+                with self.subTest():
+                    body = self.decode(response, codec)
+                    self.assertEqual(body['msg'], 'Name Already Exists')
+
+
+    def test_add_entry_d(self):
+        """
+        add_entry controller success test.
+        MessagePack request body with the default
+        JSON response.
+        """
+
+        # Login
+        access_token = self.login('admin_user', 'password')
+
+        # Mock member data
+        name = 'foobar'
+        email = 'foo@bar.baz'
+        phone = '8001234567'
+        mock_data = dict(name=name, email=email, phone=phone)
+
+        headers = {'content-type': 'application/x-msgpack',
+                   'Authorization': 'Bearer %s' % access_token}
+        response = self.app.put('/',
+                                data=msgpack.packb(mock_data),
+                                headers=headers)
         with self.subTest():
-            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response.status_code, 201)
+        with self.subTest():
+            self.assertEqual(response.mimetype, 'application/json')
+
+
+    def test_add_entry_e(self):
+        """
+        add_entry controller failure test.
+        MessagePack body with an unhashable map key.
+        """
+
+        # Login
+        access_token = self.login('admin_user', 'password')
+
+        # fixmap of one entry whose key is the array [1]
+        data = b'\x81\x91\x01\x01'
+
+        headers = {'content-type': 'application/x-msgpack',
+                   'Authorization': 'Bearer %s' % access_token}
+        response = self.app.put('/', data=data, headers=headers)
+        with self.subTest():
+            self.assertEqual(response.status_code, 400)
         with self.subTest():
             json_response = json.loads(response.get_data(as_text=True))
-            self.assertEqual(json_response['msg'], 'Name Already Exists')
+            self.assertEqual(json_response['msg'], 'Missing JSON In Request')
 
 
     def test_delete_entry_a(self):
@@ -331,48 +580,156 @@ class ControllersTestCases(unittest.TestCase):
         delete_entry controller success test.
         """
 
+        for codec in self.CODECS:
+            with self.subTest(codec=codec):
+                self.reset()
+                response = self.request_helper('DELETE', 'admin_user',
+                                               dict(memberID='1'), codec)
+                with self.subTest():
+                    self.assertEqual(response.status_code, 200)
+                with self.subTest():
+                    body = self.decode(response, codec)
+                    self.assertEqual(body['msg'], 'success')
+
+
+    def test_delete_entry_b(self):
+        """
+        delete_entry controller failure test.
+        User has wrong access privilege.
+        """
+
+        for codec in self.CODECS:
+            with self.subTest(codec=codec):
+                response = self.request_helper('DELETE', 'nothing_user',
+                                               dict(memberID='1'), codec)
+                with self.subTest():
+                    self.assertEqual(response.status_code, 200)
+                with self.subTest():
+                    body = self.decode(response, codec)
+                    self.assertEqual(body['msg'], 'Access Denied')
+
+
+    def test_delete_entry_c(self):
+        """
+        delete_entry controller failure test.
+        No such `memberID`
+        """
+
+        for codec in self.CODECS:
+            with self.subTest(codec=codec):
+                response = self.request_helper('DELETE', 'admin_user',
+                                               dict(memberID='8'), codec)
+                with self.subTest():
+                    self.assertEqual(response.status_code, 404)
+                with self.subTest():
+                    body = self.decode(response, codec)
+                    self.assertEqual(body['msg'], 'No Such Entry')
+
+
+    def test_profile_a(self):
+        """
+        profiled decorator success test.
+        Admin request writes a pstats dump which
+        can be fetched from `/profile/<name>`.
+        """
+
         # Login
         access_token = self.login('admin_user', 'password')
 
         # Generate request
         headers = {'content-type': 'application/json',
+                   'X-Profile': '1',
                    'Authorization': 'Bearer %s' % access_token}
-        response = self.app.delete('/',
+        response = self.app.get('/',
                                 data=json.dumps(dict(memberID='1')),
                                 headers=headers)
         with self.subTest():
             self.assertEqual(response.status_code, 200)
         with self.subTest():
-            json_response = json.loads(response.get_data(as_text=True))
-            self.assertEqual(json_response['msg'], 'success')
+            self.assertIn(response.headers['X-Profile-File'],
+                          os.listdir(trip_test.app.config['PROFILE_DIR']))
 
+        name = response.headers['X-Profile-File']
+        response = self.app.get('/profile/%s' % name, headers=headers)
+        with self.subTest():
+            self.assertEqual(response.status_code, 200)
+        with self.subTest():
+            self.assertIsInstance(marshal.loads(response.get_data()), dict)
 
-    def test_delete_entry_b(self):
+
+    def test_profile_b(self):
         """
-        delete_entry controller failure test.
+        profiled decorator failure test.
         User has wrong access privilege.
         """
 
         # Login
-        access_token = self.login('nothing_user', 'password')
+        access_token = self.login('get_user', 'password')
 
         # Generate request
         headers = {'content-type': 'application/json',
+                   'X-Profile': '1',
                    'Authorization': 'Bearer %s' % access_token}
-        response = self.app.delete('/',
+        response = self.app.get('/',
                                 data=json.dumps(dict(memberID='1')),
                                 headers=headers)
         with self.subTest():
             self.assertEqual(response.status_code, 200)
+        with self.subTest():
+            self.assertNotIn('X-Profile-File', response.headers)
+
+
+    def test_profile_c(self):
+        """
+        profiled decorator success test.
+        `X-Profile: return` sends the dump in the response.
+        """
+
+        # Login
+        access_token = self.login('admin_user', 'password')
+
+        # Generate request
+        headers = {'content-type': 'application/json',
+                   'X-Profile': 'return',
+                   'Authorization': 'Bearer %s' % access_token}
+        response = self.app.get('/',
+                                data=json.dumps(dict(memberID='1')),
+                                headers=headers)
+        with self.subTest():
+            self.assertEqual(response.mimetype, 'application/octet-stream')
+        with self.subTest():
+            self.assertIsInstance(marshal.loads(response.get_data()), dict)
+        with self.subTest():
+            self.assertEqual(os.listdir(trip_test.app.config['PROFILE_DIR']),
+                             [])
+
+
+    def test_start_profile_a(self):
+        """
+        start_profile controller failure test.
+        User has wrong access privilege.
+        """
+
+        # Login
+        access_token = self.login('get_user', 'password')
+
+        # Generate request
+        headers = {'content-type': 'application/json',
+                   'Authorization': 'Bearer %s' % access_token}
+        response = self.app.post('/profile',
+                                 data=json.dumps(dict(seconds=1)),
+                                 headers=headers)
+        with self.subTest():
+            self.assertEqual(response.status_code, 403)
         with self.subTest():
             json_response = json.loads(response.get_data(as_text=True))
             self.assertEqual(json_response['msg'], 'Access Denied')
 
 
-    def test_delete_entry_c(self):
+    def test_start_profile_b(self):
         """
-        delete_entry controller failure test.
-        No such `memberID`
+        start_profile controller failure test.
+        Non numeric sampling parameters.
         """
 
         # Login
@@ -381,14 +738,159 @@ class ControllersTestCases(unittest.TestCase):
         # Generate request
         headers = {'content-type': 'application/json',
                    'Authorization': 'Bearer %s' % access_token}
-        response = self.app.delete('/',
-                                data=json.dumps(dict(memberID='8')),
-                                headers=headers)
+        response = self.app.post('/profile',
+                                 data=json.dumps(dict(seconds='foo')),
+                                 headers=headers)
+        with self.subTest():
+            self.assertEqual(response.status_code, 400)
+        with self.subTest():
+            json_response = json.loads(response.get_data(as_text=True))
+            self.assertEqual(json_response['msg'],
+                             'Invalid Sampling Parameters')
+
+
+    def test_start_profile_c(self):
+        """
+        start_profile controller failure test.
+        Sampling parameters out of range.
+        """
+
+        # Login
+        access_token = self.login('admin_user', 'password')
+
+        # Generate request
+        headers = {'content-type': 'application/json',
+                   'Authorization': 'Bearer %s' % access_token}
+        response = self.app.post('/profile',
+                                 data=json.dumps(dict(seconds=0,
+                                                      interval=5)),
+                                 headers=headers)
+        with self.subTest():
+            self.assertEqual(response.status_code, 400)
+        with self.subTest():
+            json_response = json.loads(response.get_data(as_text=True))
+            self.assertEqual(json_response['msg'],
+                             'Invalid Sampling Parameters')
+
+
+    def test_get_profile_a(self):
+        """
+        get_profile controller failure test.
+        No such profile.
+        """
+
+        # Login
+        access_token = self.login('admin_user', 'password')
+
+        # Generate request
+        headers = {'Authorization': 'Bearer %s' % access_token}
+        response = self.app.get('/profile/missing.prof', headers=headers)
         with self.subTest():
             self.assertEqual(response.status_code, 404)
         with self.subTest():
             json_response = json.loads(response.get_data(as_text=True))
-            self.assertEqual(json_response['msg'], 'No Such Entry')
+            self.assertEqual(json_response['msg'], 'No Such Profile')
+
+
+class ProfilingTestCases(unittest.TestCase):
+    def setUp(self):
+        trip_test.app.config['PROFILE_DIR'] = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+        shutil.rmtree(trip_test.app.config['PROFILE_DIR'])
+
+
+    def test_sampler_a(self):
+        """
+        sampler success test
+        Writes collapsed request stacks and only
+        one runs at a time
+        """
+        client = trip_test.app.test_client()
+        release = threading.Event()
+
+        def blocking():
+            release.wait()
+            return 'ok'
+
+        # Hold a request inside the app for the whole window
+        view = trip_test.app.view_functions['login']
+        trip_test.app.view_functions['login'] = blocking
+        in_flight = threading.Thread(target=client.post, args=('/login',))
+        in_flight.start()
+        try:
+            sampler = trip_test.profiling.start_sampler(0.05, 0.01)
+            with self.subTest():
+                self.assertIsNone(
+                    trip_test.profiling.start_sampler(0.05, 0.01))
+            sampler.join()
+        finally:
+            release.set()
+            in_flight.join()
+            trip_test.app.view_functions['login'] = view
+
+        with open(sampler.path) as output:
+            lines = output.read().splitlines()
+        with self.subTest():
+            self.assertTrue(lines)
+        with self.subTest():
+            self.assertIn('blocking', lines[0])
+        with self.subTest():
+            for line in lines:
+                self.assertRegex(line, r'^app\.py:wsgi_app(;.+)? \d+$')
+
+        # Slot is free again once the first sampler finishes
+        sampler = trip_test.profiling.start_sampler(0, 0.01)
+        with self.subTest():
+            self.assertIsNotNone(sampler)
+        sampler.join()
+
+
+    def test_sampler_b(self):
+        """
+        sampler failure test
+        A failed write still frees the sampler slot
+        """
+        sampler = trip_test.profiling.start_sampler(0.05, 0.01)
+        # Writing to a directory raises IsADirectoryError
+        sampler.path = trip_test.app.config['PROFILE_DIR']
+        sampler.join()
+
+        sampler = trip_test.profiling.start_sampler(0, 0.01)
+        self.assertIsNotNone(sampler)
+        sampler.join()
+
+
+    def test_sampler_c(self):
+        """
+        sampler success test
+        Threads outside a request are not recorded
+        """
+        sampler = trip_test.profiling.start_sampler(0.05, 0.01)
+        sampler.join()
+
+        with open(sampler.path) as output:
+            self.assertEqual(output.read(), '')
+
+
+    def test_prune_a(self):
+        """
+        output_path success test
+        Oldest dumps are removed past PROFILE_MAX_FILES
+        """
+        trip_test.app.config['PROFILE_MAX_FILES'] = 2
+        try:
+            paths = []
+            for age in range(3):
+                path = trip_test.profiling.output_path('GET.foo', 'prof')
+                os.utime(path, (1000 + age, 1000 + age))
+                paths.append(path)
+            names = os.listdir(trip_test.app.config['PROFILE_DIR'])
+            self.assertEqual(sorted(names),
+                             sorted(os.path.basename(p) for p in paths[1:]))
+        finally:
+            trip_test.app.config['PROFILE_MAX_FILES'] = 50
 
 
 if __name__ == '__main__':